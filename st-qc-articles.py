@@ -4,14 +4,73 @@ import requests
 import json
 import time
 import concurrent.futures
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import base64
 from streamlit_lottie import st_lottie
 from streamlit_extras.add_vertical_space import add_vertical_space
 import threading
+import hashlib
+import re
+import os
+import sqlite3
+import tempfile
+import glob
+import atexit
+import uuid
+import heapq
+import math
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
 
 # Constants
 API_URL = "https://api.anthropic.com/v1/messages"
+GLOBAL_MAX_CONCURRENCY = int(os.environ.get("AP_MAX_CONCURRENCY", 14))
+PER_KEY_MAX_CONCURRENCY = int(os.environ.get("AP_MAX_CONCURRENCY_PER_KEY", 7))
+DEFAULT_CALL_LATENCY_S = 20.0
+RESULTS_DB_MAX_AGE_S = 24 * 60 * 60
+REQUESTS_PER_MINUTE = int(os.environ.get("AP_REQUESTS_PER_MINUTE", 50))
+INPUT_TOKENS_PER_MINUTE = int(os.environ.get("AP_INPUT_TOKENS_PER_MINUTE", 40000))
+
+# Model settings and planning assumptions
+MODEL = "claude-3-5-sonnet-20240620"
+MAX_OUTPUT_TOKENS = 8192
+MODEL_CONTEXT_WINDOW = 200000
+INPUT_PRICE_PER_MTOK = 3.00
+OUTPUT_PRICE_PER_MTOK = 15.00
+CHARS_PER_TOKEN = 3.5
+EXPECTED_EVALUATION_TOKENS = 150
+EXPECTED_FINAL_TOKENS = 350
+CALL_BASE_LATENCY_S = 1.5
+OUTPUT_TOKENS_PER_S = 60.0
+INPUT_TOKENS_PER_S = 5000.0
+CSV_COLUMNS = ["Topic", "Themes", "Objectives", "Key Concepts", "Article", "Questions"]
+PROMPT_KEYS = [f"prompt{i}" for i in range(1, 8)]
+EVALUATOR_NAMES = {
+    "prompt1": "Format & Word Count",
+    "prompt2": "Key Concepts & Skills",
+    "prompt3": "Themes & Objectives",
+    "prompt4": "Concepts & Formulas",
+    "prompt5": "Question Sufficiency",
+    "prompt6": "Factual Accuracy",
+    "prompt7": "Engagement & Clarity",
+}
+# Evaluators whose response carries a 0/1 score; prompt 7 only returns feedback
+SCORED_EVALUATORS = ["prompt1", "prompt2", "prompt3", "prompt4", "prompt5", "prompt6"]
+RECOMMENDATIONS = {
+    "immediate use": "Approved for immediate use",
+    "minor revisions": "Approved with minor revisions",
+    "major revisions": "Major revisions required",
+    "rejected": "Rejected as unsuitable",
+}
+
+# Evaluators whose prompts depend only on the article and course (format, factual accuracy, engagement)
+ARTICLE_ONLY_PROMPTS = ["prompt1", "prompt6", "prompt7"]
+
+# Near-duplicate detection (one-permutation MinHash over word shingles, banded for candidate lookup)
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+SHINGLE_SIZE = 5
+MINHASH_BUCKETS = 64
+MINHASH_BANDS = 16
+EMPTY_BUCKET = 1 << 64
 
 # Helper functions
 def load_lottie_url(url: str):
@@ -20,47 +79,185 @@ def load_lottie_url(url: str):
         return None
     return r.json()
 
-def call_claude_api(prompt, api_key):
+def call_claude_api(prompt, api_key, metadata=None):
     headers = {
         "x-api-key": api_key,
         "anthropic-version": "2023-06-01",
         "content-type": "application/json"
     }
     payload = {
-        "model": "claude-3-5-sonnet-20240620",
-        "max_tokens": 8192,
+        "model": MODEL,
+        "max_tokens": MAX_OUTPUT_TOKENS,
         "temperature": 0.6,
         "messages": [
             {"role": "user", "content": prompt}
         ]
     }
 
+    start_time = time.time()
     response = requests.post(API_URL, headers=headers, json=payload)
+    if metadata is not None:
+        metadata["latency_s"] = time.time() - start_time
     if response.status_code == 200:
-        return response.json()['content'][0]['text']
+        body = response.json()
+        if metadata is not None:
+            usage = body.get("usage", {})
+            metadata["input_tokens"] = usage.get("input_tokens")
+            metadata["output_tokens"] = usage.get("output_tokens")
+        return body['content'][0]['text']
+    elif metadata is not None:
+        # Scheduler threads have no Streamlit script context, so the caller reports the error
+        metadata["status_code"] = response.status_code
+        metadata["error_response"] = response.text
+        return None
     else:
         st.error(f"API call failed with status code: {response.status_code}")
         st.error(f"Response: {response.text}")
         return None
 
-def parallel_api_calls(prompts, api_key):
-    responses = [None] * len(prompts)
-    with ThreadPoolExecutor(max_workers=7) as executor:
-        future_to_index = {executor.submit(call_claude_api, prompt, api_key): i for i, prompt in enumerate(prompts)}
+def report_api_error(metadata):
+    if "status_code" in metadata:
+        st.error(f"API call failed with status code: {metadata['status_code']}")
+        st.error(f"Response: {metadata['error_response']}")
+
+class RequestScheduler:
+    """Process-wide queue of API calls shared by every Streamlit session.
+
+    Calls are dispatched round-robin across sessions, so a long batch only gets one turn
+    per cycle, while global and per-API-key limits cap outbound concurrency.
+    """
+
+    def __init__(self, max_workers=GLOBAL_MAX_CONCURRENCY, max_per_key=PER_KEY_MAX_CONCURRENCY):
+        self.max_workers = max_workers
+        self.max_per_key = max_per_key
+        self._condition = threading.Condition()
+        self._queues = OrderedDict()  # session_id -> deque of pending jobs
+        self._in_flight = 0
+        self._in_flight_by_key = {}
+        self._avg_latency = DEFAULT_CALL_LATENCY_S
+        for _ in range(max_workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    @staticmethod
+    def _key_id(api_key):
+        return hashlib.sha256(str(api_key).encode("utf-8")).hexdigest()[:16]
+
+    def submit(self, session_id, api_key, fn, *args):
+        future = concurrent.futures.Future()
+        with self._condition:
+            self._queues.setdefault(session_id, deque()).append((future, self._key_id(api_key), fn, args))
+            self._condition.notify()
+        return future
+
+    def _next_job(self):
+        # Serve the first session whose API key has a free slot, then send it to the back of the line
+        for session_id, queue in self._queues.items():
+            job = queue[0]
+            if self._in_flight_by_key.get(job[1], 0) < self.max_per_key:
+                queue.popleft()
+                if queue:
+                    self._queues.move_to_end(session_id)
+                else:
+                    del self._queues[session_id]
+                return job
+        return None
 
-        for future in concurrent.futures.as_completed(future_to_index):
-            index = future_to_index[future]
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+                future, key_id, fn, args = job
+                self._in_flight += 1
+                self._in_flight_by_key[key_id] = self._in_flight_by_key.get(key_id, 0) + 1
+
+            start_time = time.time()
             try:
-                responses[index] = future.result()
-            except Exception as exc:
-                st.error(f'Prompt {index} generated an exception: {exc}')
-                responses[index] = f"Error: {exc}"
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args))
+                    except Exception as exc:
+                        future.set_exception(exc)
+            finally:
+                with self._condition:
+                    self._in_flight -= 1
+                    self._in_flight_by_key[key_id] -= 1
+                    self._avg_latency = 0.8 * self._avg_latency + 0.2 * (time.time() - start_time)
+                    self._condition.notify_all()
+
+    def queue_status(self, session_id, api_key):
+        key_id = self._key_id(api_key)
+        with self._condition:
+            sessions = list(self._queues)
+            # Only calls on the same API key compete for this session's slots
+            queue_lengths = {sid: sum(job[1] == key_id for job in queue) for sid, queue in self._queues.items()}
+            in_flight = self._in_flight_by_key.get(key_id, 0)
+            avg_latency = self._avg_latency
+
+        slots = min(self.max_workers, self.max_per_key)
+        queued = queue_lengths.get(session_id, 0)
+        position = sessions.index(session_id) + 1 if queued else 0
+        # Under round-robin every other session gets up to as many turns as we need
+        jobs_ahead = sum(min(length, queued) for sid, length in queue_lengths.items() if sid != session_id)
+        expected_wait = (in_flight + jobs_ahead + queued) / slots * avg_latency if queued else 0.0
+        return {
+            "queued": queued,
+            "position": position,
+            "sessions": len(sessions),
+            "in_flight": in_flight,
+            "slots": slots,
+            "expected_wait_s": expected_wait,
+        }
+
+@st.cache_resource
+def get_request_scheduler():
+    return RequestScheduler()
+
+def show_queue_status(status, scheduler, session_id, api_key):
+    queue = scheduler.queue_status(session_id, api_key)
+    if queue["queued"]:
+        status.caption(f"Queue position {queue['position']} of {queue['sessions']} waiting sessions, "
+                       f"{queue['queued']} calls queued for this session, "
+                       f"{queue['in_flight']}/{queue['slots']} slots busy for this API key, "
+                       f"expected wait ~{queue['expected_wait_s']:.0f}s")
+    else:
+        status.caption(f"Waiting on API responses ({queue['in_flight']}/{queue['slots']} slots busy for this API key)")
+
+def wait_for_calls(futures, api_key, session_id=None, status=None):
+    scheduler = get_request_scheduler()
+    pending = set(futures)
+    while pending:
+        if status is not None:
+            show_queue_status(status, scheduler, session_id, api_key)
+        _, pending = concurrent.futures.wait(pending, timeout=1, return_when=concurrent.futures.FIRST_COMPLETED)
+    if status is not None:
+        status.empty()
+
+def parallel_api_calls(prompts, api_key, metadata=None, session_id=None, status=None):
+    scheduler = get_request_scheduler()
+    responses = [None] * len(prompts)
+    call_metadata = [{} for _ in prompts]
+    future_to_index = {scheduler.submit(session_id, api_key, call_claude_api, prompt, api_key, call_metadata[i]): i
+                       for i, prompt in enumerate(prompts)}
+
+    wait_for_calls(future_to_index, api_key, session_id, status)
+    for future, index in future_to_index.items():
+        try:
+            responses[index] = future.result()
+        except Exception as exc:
+            st.error(f'Prompt {index} generated an exception: {exc}')
+            responses[index] = f"Error: {exc}"
 
     for i, response in enumerate(responses):
+        report_api_error(call_metadata[i])
         if response is None:
             st.warning(f"Warning: No response received for prompt {i}")
             responses[i] = "No response received"
 
+    if metadata is not None:
+        metadata.extend(call_metadata)
     return responses
 
 def generate_prompt1(ARTICLE, COURSE):
@@ -541,13 +738,13 @@ Important:
 """
 
 
-def process_row(row_data, course, api_key, prompt_states, edited_prompts):
-    TOPIC, THEMES, OBJECTIVES, KEY_CONCEPTS, ARTICLE, QUESTIONS = row_data
+def format_prompt(prompt_template, **kwargs):
+    for key, value in kwargs.items():
+        prompt_template = prompt_template.replace(f"{{{{{key}}}}}", str(value))
+    return prompt_template
 
-    def format_prompt(prompt_template, **kwargs):
-        for key, value in kwargs.items():
-            prompt_template = prompt_template.replace(f"{{{{{key}}}}}", str(value))
-        return prompt_template
+def render_prompts(row_data, course, prompt_states, edited_prompts):
+    TOPIC, THEMES, OBJECTIVES, KEY_CONCEPTS, ARTICLE, QUESTIONS = row_data
 
     prompts = [
         format_prompt(edited_prompts['prompt1'], ARTICLE=ARTICLE, COURSE=course) if prompt_states["prompt1"] else None,
@@ -560,19 +757,39 @@ def process_row(row_data, course, api_key, prompt_states, edited_prompts):
     ]
 
     # Filter out None values (disabled prompts)
-    prompts = [p for p in prompts if p is not None]
+    return [(key, prompt) for key, prompt in zip(PROMPT_KEYS, prompts) if prompt is not None]
 
-    responses = parallel_api_calls(prompts, api_key)
-
-    # Prepare all_responses
+def format_all_responses(responses):
     all_responses = "<evaluation_results>\n"
     for i, response in enumerate(responses):
         all_responses += f"<evaluation_{i+1}>\n{response}\n</evaluation_{i+1}>\n"
     all_responses += "</evaluation_results>"
-
-    final_prompt = format_prompt(edited_prompts['final_prompt'], all_responses=all_responses, COURSE=course)
-    final_response = call_claude_api(final_prompt, api_key)
-
+    return all_responses
+
+def process_row(row_data, course, api_key, prompt_states, edited_prompts, reused_responses=None, metadata=None,
+                session_id=None, status=None, evaluator_responses=None):
+    enabled = render_prompts(row_data, course, prompt_states, edited_prompts)
+
+    # Only call the API for evaluators that have no reusable response
+    reused_responses = reused_responses or {}
+    to_call = [(key, prompt) for key, prompt in enabled if key not in reused_responses]
+    call_metadata = []
+    called = dict(zip([key for key, _ in to_call], parallel_api_calls([prompt for _, prompt in to_call], api_key, call_metadata, session_id, status)))
+    called_metadata = dict(zip([key for key, _ in to_call], call_metadata))
+    responses = [reused_responses[key] if key in reused_responses else called[key] for key, _ in enabled]
+    if evaluator_responses is not None:
+        evaluator_responses.update(zip([key for key, _ in enabled], responses))
+
+    final_prompt = format_prompt(edited_prompts['final_prompt'], all_responses=format_all_responses(responses), COURSE=course)
+    final_metadata = {}
+    final_future = get_request_scheduler().submit(session_id, api_key, call_claude_api, final_prompt, api_key, final_metadata)
+    wait_for_calls([final_future], api_key, session_id, status)
+    final_response = final_future.result()
+    report_api_error(final_metadata)
+
+    if metadata is not None:
+        metadata.extend(called_metadata.get(key, {"reused": True}) for key, _ in enabled)
+        metadata.append(final_metadata)
     return responses + [final_response]
 
 def get_csv_download_link(df, filename="processed_articles.csv"):
@@ -581,23 +798,546 @@ def get_csv_download_link(df, filename="processed_articles.csv"):
     href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">Download Processed CSV</a>'
     return href
 
-def process_csv(df, course, api_key, start_row, end_row, progress_bar, stop_flag, download_button, prompt_states, edited_prompts):
+def normalize_article(article):
+    return " ".join(str(article).lower().split())
+
+def article_fingerprint(article):
+    return hashlib.sha256(normalize_article(article).encode("utf-8")).hexdigest()
+
+def article_shingles(article, size=SHINGLE_SIZE):
+    words = re.findall(r"\w+", normalize_article(article))
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash_signature(article):
+    # Hash each shingle once and keep the minimum per bucket instead of one pass per permutation
+    signature = [EMPTY_BUCKET] * MINHASH_BUCKETS
+    for shingle in article_shingles(article):
+        value, bucket = divmod(int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"), MINHASH_BUCKETS)
+        if value < signature[bucket]:
+            signature[bucket] = value
+    return tuple(signature)
+
+@st.cache_data(show_spinner=False, max_entries=100000)
+def article_signature(fingerprint, _article):
+    # Keyed on the fingerprint only, so reruns and threshold changes never re-shingle an article
+    return minhash_signature(_article)
+
+def sign_articles(articles):
+    signed = []
+    for article in articles:
+        fingerprint = article_fingerprint(article)
+        signed.append((fingerprint, article_signature(fingerprint, article)))
+    return signed
+
+def estimate_similarity(signature_a, signature_b):
+    filled = sum(a != EMPTY_BUCKET or b != EMPTY_BUCKET for a, b in zip(signature_a, signature_b))
+    matching = sum(a == b != EMPTY_BUCKET for a, b in zip(signature_a, signature_b))
+    return matching / filled if filled else 1.0
+
+def signature_bands(signature):
+    rows = MINHASH_BUCKETS // MINHASH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows]) for band in range(MINHASH_BANDS)]
+
+def new_article_index():
+    return {"entries": [], "exact": {}, "bands": {}}
+
+def add_article(article_index, fingerprint, signature):
+    entry = {"fingerprint": fingerprint, "signature": signature, "responses": {}}
+    position = len(article_index["entries"])
+    article_index["entries"].append(entry)
+    article_index["exact"][fingerprint] = position
+    for band in signature_bands(signature):
+        article_index["bands"].setdefault(band, []).append(position)
+    return entry
+
+def find_similar_article(article_index, fingerprint, signature, threshold):
+    """Return (entry, similarity) for the closest indexed article, or (None, 0.0) if none reaches the threshold."""
+    if fingerprint in article_index["exact"]:
+        return article_index["entries"][article_index["exact"][fingerprint]], 1.0
+    if threshold >= 1.0:
+        return None, 0.0
+
+    candidates = set()
+    for band in signature_bands(signature):
+        candidates.update(article_index["bands"].get(band, []))
+
+    best_entry, best_similarity = None, 0.0
+    for position in candidates:
+        entry = article_index["entries"][position]
+        similarity = estimate_similarity(signature, entry["signature"])
+        if similarity >= threshold and similarity > best_similarity:
+            best_entry, best_similarity = entry, similarity
+    return best_entry, best_similarity
+
+def summarize_duplicate_articles(signed_articles, threshold):
+    article_index = new_article_index()
+    stats = {"rows": len(signed_articles), "unique": 0, "exact_duplicates": 0, "near_duplicates": 0}
+    for fingerprint, signature in signed_articles:
+        entry, similarity = find_similar_article(article_index, fingerprint, signature, threshold)
+        if entry is None:
+            add_article(article_index, fingerprint, signature)
+            stats["unique"] += 1
+        elif entry["fingerprint"] == fingerprint:
+            stats["exact_duplicates"] += 1
+        else:
+            stats["near_duplicates"] += 1
+    return stats
+
+def template_fingerprint(prompt_template, course):
+    return hashlib.sha256(f"{course}\n{prompt_template}".encode("utf-8")).hexdigest()[:12]
+
+def reuse_key(prompt_key, course, prompt_template):
+    return f"{prompt_key}|{template_fingerprint(prompt_template, course)}"
+
+def is_reusable_response(response):
+    return isinstance(response, str) and bool(response) and response not in ("NA", "No response received") and not response.startswith("Error")
+
+def get_reusable_responses(entry, course, prompt_states, edited_prompts):
+    reused = {}
+    for key in ARTICLE_ONLY_PROMPTS:
+        if prompt_states[key]:
+            response = entry["responses"].get(reuse_key(key, course, edited_prompts[key]))
+            if response is not None:
+                reused[key] = response
+    return reused
+
+def store_reusable_responses(entry, course, prompt_states, edited_prompts, responses):
+    enabled_keys = [key for key in PROMPT_KEYS if prompt_states[key]]
+    for key, response in zip(enabled_keys, responses):
+        if key in ARTICLE_ONLY_PROMPTS and is_reusable_response(response):
+            entry["responses"].setdefault(reuse_key(key, course, edited_prompts[key]), response)
+
+RESULTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT,
+    course TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS evaluations (
+    run_id INTEGER,
+    row_index INTEGER,
+    topic TEXT,
+    evaluator TEXT,
+    score INTEGER,
+    rationale TEXT,
+    feedback TEXT,
+    raw_response TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    latency_s REAL,
+    reused INTEGER,
+    PRIMARY KEY (run_id, row_index, evaluator)
+);
+CREATE TABLE IF NOT EXISTS final_evaluations (
+    run_id INTEGER,
+    row_index INTEGER,
+    topic TEXT,
+    total_score REAL,
+    recommendation TEXT,
+    key_strengths TEXT,
+    key_weaknesses TEXT,
+    raw_response TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    latency_s REAL,
+    PRIMARY KEY (run_id, row_index)
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_score ON evaluations (run_id, evaluator, score);
+CREATE INDEX IF NOT EXISTS idx_final_recommendation ON final_evaluations (run_id, recommendation);
+"""
+
+def remove_results_db(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def cleanup_stale_results_dbs():
+    # Sessions have no end hook, so remove databases that have not been written for a day
+    cutoff = time.time() - RESULTS_DB_MAX_AGE_S
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), "ap_results_*.sqlite3")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+def get_results_store():
+    # One SQLite file per session so editors only see their own runs
+    if "results_db_path" not in st.session_state or not os.path.exists(st.session_state.results_db_path):
+        if "results_store" in st.session_state:
+            st.session_state.results_store.close()
+        cleanup_stale_results_dbs()
+        path = os.path.join(tempfile.gettempdir(), f"ap_results_{uuid.uuid4().hex}.sqlite3")
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.executescript(RESULTS_SCHEMA)
+        atexit.register(remove_results_db, path)
+        st.session_state.results_db_path = path
+        st.session_state.results_store = conn
+    return st.session_state.results_store
+
+def delete_results_store():
+    st.session_state.pop("results_store").close()
+    remove_results_db(st.session_state.pop("results_db_path"))
+
+def start_results_run(conn, course, source):
+    cursor = conn.execute("INSERT INTO runs (created_at, course, source) VALUES (?, ?, ?)",
+                          (datetime.now(timezone.utc).isoformat(timespec="seconds"), course, source))
+    conn.commit()
+    return cursor.lastrowid
+
+def parse_evaluation_json(response):
+    if not response:
+        return {}
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end < start:
+        return {}
+    try:
+        parsed = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+def to_number(value, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+def normalize_recommendation(recommendation):
+    if not recommendation:
+        return None
+    lowered = str(recommendation).lower()
+    for marker, label in RECOMMENDATIONS.items():
+        if marker in lowered:
+            return label
+    return str(recommendation)
+
+def write_row_results(conn, run_id, row_index, topic, evaluator_keys, responses, metadata):
+    evaluation_rows = []
+    for key, response, meta in zip(evaluator_keys, responses, metadata):
+        parsed = parse_evaluation_json(response)
+        evaluation_rows.append((run_id, row_index, topic, key, to_number(parsed.get("score"), int),
+                                parsed.get("rationale"), parsed.get("feedback"), response,
+                                meta.get("input_tokens"), meta.get("output_tokens"), meta.get("latency_s"),
+                                int(meta.get("reused", False))))
+    conn.executemany("INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", evaluation_rows)
+
+    final_response, final_meta = responses[-1], metadata[-1]
+    parsed = parse_evaluation_json(final_response)
+    conn.execute("INSERT OR REPLACE INTO final_evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                 (run_id, row_index, topic, to_number(parsed.get("total_score")),
+                  normalize_recommendation(parsed.get("recommendation")),
+                  json.dumps(parsed.get("key_strengths", [])), json.dumps(parsed.get("key_weaknesses", [])),
+                  final_response, final_meta.get("input_tokens"), final_meta.get("output_tokens"), final_meta.get("latency_s")))
+    conn.commit()
+
+def unparsed_condition(table=""):
+    # Feedback-only evaluators have no score, so they count as unparsed only when feedback is missing
+    scored = ", ".join(f"'{key}'" for key in SCORED_EVALUATORS)
+    return (f"(({table}evaluator IN ({scored}) AND {table}score IS NULL) "
+            f"OR ({table}evaluator NOT IN ({scored}) AND {table}feedback IS NULL))")
+
+def render_results_explorer(conn):
+    runs = pd.read_sql_query("SELECT run_id, created_at, course, source FROM runs ORDER BY run_id DESC", conn)
+    if runs.empty:
+        return
+
+    st.header("Results Explorer")
+    run_labels = {r.run_id: f"Run {r.run_id} - {r.course} - {r.source} ({r.created_at})" for r in runs.itertuples()}
+    run_id = st.selectbox("Select run", list(run_labels), format_func=run_labels.get)
+
+    scored = ", ".join(f"'{key}'" for key in SCORED_EVALUATORS)
+
+    st.subheader("Evaluator Summary")
+    st.dataframe(pd.read_sql_query(f"""
+        SELECT evaluator, COUNT(*) AS rows,
+               CASE WHEN evaluator IN ({scored}) THEN AVG(score) END AS pass_rate,
+               SUM({unparsed_condition()}) AS unparsed, SUM(reused) AS reused,
+               SUM(input_tokens) AS input_tokens, SUM(output_tokens) AS output_tokens, AVG(latency_s) AS avg_latency_s
+        FROM evaluations WHERE run_id = ? GROUP BY evaluator ORDER BY evaluator
+    """, conn, params=(run_id,)).assign(evaluator=lambda d: d["evaluator"].map(EVALUATOR_NAMES)))
+
+    st.subheader("Recommendations")
+    st.dataframe(pd.read_sql_query("""
+        SELECT recommendation, COUNT(*) AS rows, AVG(total_score) AS avg_total_score
+        FROM final_evaluations WHERE run_id = ? GROUP BY recommendation ORDER BY rows DESC
+    """, conn, params=(run_id,)))
+
+    st.subheader("Filter Evaluations")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        evaluators = st.multiselect("Evaluators", PROMPT_KEYS, default=PROMPT_KEYS, format_func=EVALUATOR_NAMES.get)
+    with col2:
+        score_filter = st.selectbox("Score", ("All", "1", "0", "Unparsed"))
+    with col3:
+        recommendations = st.multiselect("Recommendation", list(RECOMMENDATIONS.values()))
+
+    query = """
+        SELECT e.row_index, e.topic, e.evaluator, e.score, e.rationale, e.feedback,
+               f.total_score, f.recommendation, e.input_tokens, e.output_tokens, e.latency_s
+        FROM evaluations e LEFT JOIN final_evaluations f ON e.run_id = f.run_id AND e.row_index = f.row_index
+        WHERE e.run_id = ?
+    """
+    params = [run_id]
+    if evaluators:
+        query += f" AND e.evaluator IN ({', '.join('?' * len(evaluators))})"
+        params += evaluators
+    if score_filter == "Unparsed":
+        query += f" AND {unparsed_condition('e.')}"
+    elif score_filter != "All":
+        query += " AND e.score = ?"
+        params.append(int(score_filter))
+    if recommendations:
+        query += f" AND f.recommendation IN ({', '.join('?' * len(recommendations))})"
+        params += recommendations
+    query += " ORDER BY e.row_index, e.evaluator LIMIT 5000"
+
+    filtered = pd.read_sql_query(query, conn, params=params)
+    filtered["evaluator"] = filtered["evaluator"].map(EVALUATOR_NAMES)
+    st.write(f"{len(filtered)} matching evaluations")
+    st.dataframe(filtered)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with open(st.session_state.results_db_path, "rb") as db_file:
+            st.download_button("Download Results Database (SQLite)", db_file.read(), file_name="ap_evaluations.sqlite3")
+    with col2:
+        st.button("Delete Results", on_click=delete_results_store)
+
+def evaluation_column(prompt_key):
+    return f"Evaluation_{prompt_key[len('prompt'):]}"
+
+def build_prompt_fingerprints(course, edited_prompts):
+    return {key: template_fingerprint(edited_prompts[key], course) for key in PROMPT_KEYS + ["final_prompt"]}
+
+def load_prompt_fingerprints(row):
+    try:
+        stored = json.loads(row.get("Prompt_Fingerprints"))
+    except (TypeError, ValueError):
+        return {}
+    return stored if isinstance(stored, dict) else {}
+
+def find_stale_evaluators(row, current_fingerprints, prompt_states):
+    """Return (stale prompt keys, whether Final_Evaluation must be re-run) for a previously processed row."""
+    stored = load_prompt_fingerprints(row)
+    stale = [key for key in PROMPT_KEYS if prompt_states[key]
+             and (stored.get(key) != current_fingerprints[key] or not is_reusable_response(row.get(evaluation_column(key))))]
+    # Final_Evaluation summarizes the evaluators enabled when it was produced, so a changed set makes it stale
+    stored_keys = {key for key in stored if key != "final_prompt"}
+    enabled_keys = {key for key in PROMPT_KEYS if prompt_states[key]}
+    final_stale = (bool(stale) or stored_keys != enabled_keys
+                   or stored.get("final_prompt") != current_fingerprints["final_prompt"]
+                   or not is_reusable_response(row.get("Final_Evaluation")))
+    return stale, final_stale
+
+def plan_partial_rerun(df, course, prompt_states, edited_prompts):
+    current_fingerprints = build_prompt_fingerprints(course, edited_prompts)
+    plan = {"rows": len(df), "rows_to_update": 0, "stale": {key: 0 for key in PROMPT_KEYS if prompt_states[key]}, "final": 0}
+    for _, row in df.iterrows():
+        stale, final_stale = find_stale_evaluators(row, current_fingerprints, prompt_states)
+        for key in stale:
+            plan["stale"][key] += 1
+        plan["final"] += final_stale
+        plan["rows_to_update"] += final_stale
+    plan["calls"] = sum(plan["stale"].values()) + plan["final"]
+    plan["full_calls"] = plan["rows"] * (len(plan["stale"]) + 1)
+    return plan
+
+def estimate_tokens(text):
+    # Local approximation; no tokenizer ships with the app
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def estimate_call_latency(input_tokens, output_tokens):
+    return CALL_BASE_LATENCY_S + input_tokens / INPUT_TOKENS_PER_S + output_tokens / OUTPUT_TOKENS_PER_S
+
+def format_duration(seconds):
+    # Total hours, so multi-day runs are not wrapped at 24 hours
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+def simulate_wall_time(row_calls, concurrency, requests_per_minute):
+    """Simulate sequential rows whose evaluator calls run in parallel before the final call.
+
+    row_calls holds (evaluator latencies, final latency) per row; returns the projected seconds.
+    """
+    clock = 0.0
+    recent_starts = deque()
+
+    def rate_limited(start):
+        if requests_per_minute:
+            start = max(start, recent_starts[-1]) if recent_starts else start
+            while len(recent_starts) >= requests_per_minute:
+                if recent_starts[0] <= start - 60:
+                    recent_starts.popleft()
+                else:
+                    start = recent_starts[0] + 60
+            recent_starts.append(start)
+        return start
+
+    for evaluator_latencies, final_latency in row_calls:
+        slots = [clock] * max(1, min(concurrency, len(evaluator_latencies)))
+        row_end = clock
+        for latency in evaluator_latencies:
+            start = rate_limited(heapq.heappop(slots))
+            heapq.heappush(slots, start + latency)
+            row_end = max(row_end, start + latency)
+        clock = rate_limited(row_end) + final_latency
+    return clock
+
+def plan_run(df, course, prompt_states, edited_prompts, concurrency, requests_per_minute, input_tokens_per_minute,
+             partial_rerun=False, article_index=None, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD):
+    """Render the prompts process_csv would send for the rows in df, without sending them, and project tokens, cost and time.
+
+    Mirrors process_csv: with partial_rerun only stale evaluators and their final call are counted, and with an
+    article_index the article-only evaluators of duplicate articles are treated as reused.
+    """
+    current_fingerprints = build_prompt_fingerprints(course, edited_prompts)
+    enabled_article_only = {key for key in ARTICLE_ONLY_PROMPTS if prompt_states[key]}
+    planned_index = new_article_index()  # articles first seen in this plan; the session index is left untouched
+    available = {}  # article fingerprint -> article-only evaluators that will be reusable by later duplicates
+    rows, row_calls = [], []
+    for index, row in df.iterrows():
+        enabled = render_prompts(row[CSV_COLUMNS].tolist(), course, prompt_states, edited_prompts)
+        to_call = {key for key, _ in enabled}
+        if partial_rerun:
+            stale, final_stale = find_stale_evaluators(row, current_fingerprints, prompt_states)
+            if not final_stale:
+                continue
+            to_call = set(stale)
+
+        if article_index is not None:
+            fingerprint = article_fingerprint(row["Article"])
+            signature = article_signature(fingerprint, row["Article"])
+            entry, _ = find_similar_article(article_index, fingerprint, signature, similarity_threshold)
+            if entry is None:
+                entry, _ = find_similar_article(planned_index, fingerprint, signature, similarity_threshold)
+            if entry is None:
+                entry = add_article(planned_index, fingerprint, signature)
+            if entry["fingerprint"] not in available:
+                available[entry["fingerprint"]] = set(get_reusable_responses(entry, course, prompt_states, edited_prompts))
+            to_call -= available[entry["fingerprint"]]
+            available[entry["fingerprint"]] |= enabled_article_only
+
+        evaluator_tokens = [estimate_tokens(prompt) for key, prompt in enabled if key in to_call]
+        placeholder = "x" * int(EXPECTED_EVALUATION_TOKENS * CHARS_PER_TOKEN)
+        final_prompt = format_prompt(edited_prompts['final_prompt'], all_responses=format_all_responses([placeholder] * len(enabled)), COURSE=course)
+        final_tokens = estimate_tokens(final_prompt)
+
+        row_calls.append(([estimate_call_latency(tokens, EXPECTED_EVALUATION_TOKENS) for tokens in evaluator_tokens],
+                          estimate_call_latency(final_tokens, EXPECTED_FINAL_TOKENS)))
+        largest_prompt = max(evaluator_tokens + [final_tokens])
+        rows.append({
+            "row": index,
+            "topic": row["Topic"],
+            "calls": len(evaluator_tokens) + 1,
+            "input_tokens": sum(evaluator_tokens) + final_tokens,
+            "largest_prompt_tokens": largest_prompt,
+            "exceeds_context": largest_prompt + MAX_OUTPUT_TOKENS > MODEL_CONTEXT_WINDOW,
+        })
+
+    row_plan = pd.DataFrame(rows, columns=["row", "topic", "calls", "input_tokens", "largest_prompt_tokens", "exceeds_context"])
+    calls = int(row_plan["calls"].sum())
+    input_tokens = int(row_plan["input_tokens"].sum())
+    expected_output = (calls - len(rows)) * EXPECTED_EVALUATION_TOKENS + len(rows) * EXPECTED_FINAL_TOKENS
+    full_calls = len(df) * (sum(1 for key in PROMPT_KEYS if prompt_states[key]) + 1)
+    max_output = calls * MAX_OUTPUT_TOKENS
+
+    wall_time = simulate_wall_time(row_calls, concurrency, requests_per_minute)
+    if input_tokens_per_minute:
+        wall_time = max(wall_time, input_tokens / input_tokens_per_minute * 60)
+
+    def cost(output_tokens):
+        return (input_tokens * INPUT_PRICE_PER_MTOK + output_tokens * OUTPUT_PRICE_PER_MTOK) / 1_000_000
+
+    return {
+        "rows": len(df),
+        "calls": calls,
+        "full_calls": full_calls,
+        "input_tokens": input_tokens,
+        "expected_output_tokens": expected_output,
+        "max_output_tokens": max_output,
+        "expected_cost": cost(expected_output),
+        "max_cost": cost(max_output),
+        "wall_time_s": wall_time,
+        "row_plan": row_plan,
+    }
+
+def process_csv(df, course, api_key, start_row, end_row, progress_bar, stop_flag, download_button, prompt_states, edited_prompts,
+                article_index=None, similarity_threshold=DEFAULT_SIMILARITY_THRESHOLD, dedup_stats=None,
+                results_store=None, run_id=None, session_id=None, queue_status=None, partial_rerun=False):
     results = []
+    enabled_keys = [key for key in PROMPT_KEYS if prompt_states[key]]
+    current_fingerprints = build_prompt_fingerprints(course, edited_prompts)
     for index, row in df.iloc[start_row:end_row+1].iterrows():
         if stop_flag.is_set():
             break
+
+        # Keep evaluations whose prompt template is unchanged since the CSV was processed
+        previous = {}
+        if partial_rerun:
+            stale, final_stale = find_stale_evaluators(row, current_fingerprints, prompt_states)
+            if not final_stale:
+                # Record the untouched row too so the run's aggregates cover the whole range
+                if results_store is not None:
+                    existing = [row[evaluation_column(key)] for key in enabled_keys] + [row["Final_Evaluation"]]
+                    write_row_results(results_store, run_id, index, row["Topic"], enabled_keys, existing,
+                                      [{"reused": True} for _ in existing])
+                progress_bar.progress((index - start_row + 1) / (end_row - start_row + 1))
+                continue
+            previous = {key: row[evaluation_column(key)] for key in enabled_keys if key not in stale}
+
+        evaluator_responses = {}
         try:
-            row_data = row.tolist()
-            responses = process_row(row_data, course, api_key, prompt_states, edited_prompts)
+            row_data = row[CSV_COLUMNS].tolist()
+
+            # Reuse article-only evaluations from identical or near-identical articles
+            entry, reused = None, {}
+            if article_index is not None:
+                fingerprint = article_fingerprint(row["Article"])
+                signature = article_signature(fingerprint, row["Article"])
+                entry, similarity = find_similar_article(article_index, fingerprint, signature, similarity_threshold)
+                if entry is None:
+                    entry = add_article(article_index, fingerprint, signature)
+                else:
+                    reused = {key: response for key, response in get_reusable_responses(entry, course, prompt_states, edited_prompts).items()
+                              if key not in previous}
+                    if dedup_stats is not None and reused:
+                        dedup_stats["exact_hits" if similarity == 1.0 else "near_hits"] += 1
+                        dedup_stats["reused_calls"] += len(reused)
+
+            metadata = []
+            responses = process_row(row_data, course, api_key, prompt_states, edited_prompts, reused_responses={**reused, **previous}, metadata=metadata,
+                                    session_id=session_id, status=queue_status, evaluator_responses=evaluator_responses)
+            if entry is not None:
+                store_reusable_responses(entry, course, prompt_states, edited_prompts, responses[:-1])
             results.append(responses)
+
+            # Record which template versions produced this row's Final_Evaluation
+            row_fingerprints = {key: current_fingerprints[key] for key in enabled_keys + ["final_prompt"]}
+            df.loc[index, 'Prompt_Fingerprints'] = json.dumps(row_fingerprints)
+
+            # Write parsed results incrementally so progress survives a pause or crash
+            if results_store is not None:
+                write_row_results(results_store, run_id, index, row["Topic"], enabled_keys, responses, metadata)
         except Exception as e:
             st.error(f"Error processing row {index}: {str(e)}")
-            results.append(["NA"] * 8)  # Add NA for all 8 columns
+            # Keep carried-over and freshly returned evaluations so the next partial re-run only redoes what is missing
+            kept = {**previous, **{key: response for key, response in evaluator_responses.items() if is_reusable_response(response)}}
+            results.append([kept.get(key, "NA") for key in enabled_keys] + ["NA"])
+            df.loc[index, 'Prompt_Fingerprints'] = json.dumps({key: current_fingerprints[key] for key in enabled_keys if key in kept})
         
         # Update the DataFrame after each row is processed
-        for j, response in enumerate(results[-1][:7]):
-            df.loc[index, f'Evaluation_{j+1}'] = response
-        df.loc[index, 'Final_Evaluation'] = results[-1][7]
+        for key, response in zip(enabled_keys, results[-1][:-1]):
+            df.loc[index, evaluation_column(key)] = response
+        df.loc[index, 'Final_Evaluation'] = results[-1][-1]
+
+        # Evaluations of prompts that are now disabled did not feed this row's Final_Evaluation
+        for key in PROMPT_KEYS:
+            if not prompt_states[key] and evaluation_column(key) in df.columns:
+                df.loc[index, evaluation_column(key)] = None
         
         progress = (index - start_row + 1) / (end_row - start_row + 1)
         progress_bar.progress(progress)
@@ -621,6 +1361,10 @@ def main():
     with col2:
         st_lottie(lottie_book, speed=1, height=150, key="initial")
 
+    # Identifies this session to the shared request scheduler
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+
     # API Key input
     api_key = st.text_input("Enter your Anthropic API Key:", type="password")
     if not api_key:
@@ -684,8 +1428,10 @@ def main():
                 with st.spinner("Evaluating article..."):
                     results = []
                     progress_bar = st.progress(0)
+                    queue_status = st.empty()
                     for i, a in enumerate(articles):
-                        result = process_row(a, course, api_key, prompt_states, edited_prompts)
+                        result = process_row(a, course, api_key, prompt_states, edited_prompts,
+                                             session_id=st.session_state.session_id, status=queue_status)
                         results.append(result)
                         progress_bar.progress((i + 1) / len(articles))
 
@@ -694,10 +1440,10 @@ def main():
                         st.write(f"**Course:** {course}")
                         st.write(f"**Topic:** {article[0]}")
                         
-                        for j, response in enumerate(result[:7]):
-                            if prompt_states[f"prompt{j+1}"]:
-                                with st.expander(f"Evaluation {j+1}"):
-                                    st.json(json.loads(response))
+                        enabled_keys = [key for key in PROMPT_KEYS if prompt_states[key]]
+                        for key, response in zip(enabled_keys, result[:-1]):
+                            with st.expander(evaluation_column(key).replace("_", " ")):
+                                st.json(json.loads(response))
                         
                         with st.expander("Final Evaluation"):
                             st.json(json.loads(result[-1]))
@@ -705,14 +1451,14 @@ def main():
                 st.warning("Please enter an article to evaluate.")
 
     else:  # CSV Upload
+        results_store = get_results_store()
         uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
         if uploaded_file is not None:
             df = pd.read_csv(uploaded_file)
             st.write(df)
 
-            expected_columns = ["Topic", "Themes", "Objectives", "Key Concepts", "Article", "Questions"]
-            if not all(col in df.columns for col in expected_columns):
-                st.error(f"The CSV file must include these columns: {', '.join(expected_columns)}")
+            if not all(col in df.columns for col in CSV_COLUMNS):
+                st.error(f"The CSV file must include these columns: {', '.join(CSV_COLUMNS)}")
                 return
 
             # Row range selection
@@ -722,6 +1468,68 @@ def main():
             with col2:
                 end_row = st.number_input("End Row", min_value=start_row, max_value=len(df)-1, value=len(df)-1)
 
+            # Duplicate article detection
+            dedup_enabled = st.checkbox("Reuse evaluations for duplicate articles", value=True)
+            similarity_threshold = st.slider("Near-duplicate similarity threshold", min_value=0.5, max_value=1.0,
+                                             value=DEFAULT_SIMILARITY_THRESHOLD, step=0.01, disabled=not dedup_enabled)
+            if dedup_enabled:
+                with st.spinner("Fingerprinting articles..."):
+                    signed_articles = sign_articles(df["Article"].iloc[start_row:end_row+1].astype(str))
+                summary = summarize_duplicate_articles(signed_articles, similarity_threshold)
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Rows", summary["rows"])
+                col2.metric("Unique Articles", summary["unique"])
+                col3.metric("Exact Duplicates", summary["exact_duplicates"])
+                col4.metric("Near Duplicates", summary["near_duplicates"])
+                if "article_index" not in st.session_state:
+                    st.session_state.article_index = new_article_index()
+
+            # Partial re-evaluation of a previously processed CSV
+            partial_rerun = False
+            if "Prompt_Fingerprints" in df.columns:
+                partial_rerun = st.checkbox("Only re-run evaluators whose prompts changed", value=True)
+                if partial_rerun:
+                    plan = plan_partial_rerun(df.iloc[start_row:end_row+1], course, prompt_states, edited_prompts)
+                    st.write(f"{plan['rows_to_update']} of {plan['rows']} rows need updating: "
+                             f"{plan['calls']} API calls instead of {plan['full_calls']} for a full re-run.")
+                    stale_counts = {EVALUATOR_NAMES[key]: count for key, count in plan["stale"].items() if count}
+                    stale_counts["Final Evaluation"] = plan["final"]
+                    st.table(pd.DataFrame({"Rows to re-run": stale_counts}))
+
+            # Dry-run planner: nothing is sent to the API
+            with st.expander("Run Plan"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    plan_concurrency = st.number_input("Concurrent calls", min_value=1,
+                                                       value=min(GLOBAL_MAX_CONCURRENCY, PER_KEY_MAX_CONCURRENCY))
+                with col2:
+                    plan_rpm = st.number_input("Requests per minute (0 = unlimited)", min_value=0, value=REQUESTS_PER_MINUTE)
+                with col3:
+                    plan_itpm = st.number_input("Input tokens per minute (0 = unlimited)", min_value=0, value=INPUT_TOKENS_PER_MINUTE)
+
+                if st.button("Plan Run"):
+                    plan = plan_run(df.iloc[start_row:end_row+1], course, prompt_states, edited_prompts,
+                                    plan_concurrency, plan_rpm, plan_itpm, partial_rerun=partial_rerun,
+                                    article_index=st.session_state.article_index if dedup_enabled else None,
+                                    similarity_threshold=similarity_threshold)
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("API Calls", plan["calls"], help=f"{plan['full_calls']} for a full run of {plan['rows']} rows "
+                                                                  f"without duplicate reuse or partial re-run")
+                    col2.metric("Input Tokens", f"{plan['input_tokens']:,}")
+                    col3.metric("Output Tokens", f"{plan['expected_output_tokens']:,}",
+                                help=f"Up to {plan['max_output_tokens']:,} at the {MAX_OUTPUT_TOKENS} max_tokens budget")
+                    col4.metric("Projected Time", format_duration(plan["wall_time_s"]))
+                    st.write(f"Estimated cost: ${plan['expected_cost']:.2f} expected, ${plan['max_cost']:.2f} if every call "
+                             f"uses its full output budget.")
+                    st.caption("Token counts are approximated locally from prompt length. Duplicate reuse assumes the "
+                               "first evaluation of each article succeeds, and other sessions sharing the scheduler add wait time.")
+
+                    over_context = plan["row_plan"][plan["row_plan"]["exceeds_context"]]
+                    if not over_context.empty:
+                        st.error(f"{len(over_context)} rows have a prompt that does not fit the {MODEL_CONTEXT_WINDOW:,}-token "
+                                 f"context window with a {MAX_OUTPUT_TOKENS}-token output budget.")
+                        st.dataframe(over_context)
+
             if st.button("Process CSV"):
                 progress_bar = st.progress(0)
                 stop_flag = threading.Event()
@@ -729,6 +1537,7 @@ def main():
                 # Create placeholders for pause button and download button
                 pause_button = st.empty()
                 download_button = st.empty()
+                queue_status = st.empty()
                 
                 def pause_processing():
                     stop_flag.set()
@@ -738,8 +1547,20 @@ def main():
 
                 pause_button.button("Pause Processing", on_click=pause_processing)
 
+                dedup_stats = {"exact_hits": 0, "near_hits": 0, "reused_calls": 0}
+                article_index = st.session_state.article_index if dedup_enabled else None
+                run_id = start_results_run(results_store, course, uploaded_file.name)
+
                 with st.spinner("Processing CSV..."):
-                    results = process_csv(df, course, api_key, start_row, end_row, progress_bar, stop_flag, download_button, prompt_states, edited_prompts)
+                    results = process_csv(df, course, api_key, start_row, end_row, progress_bar, stop_flag, download_button, prompt_states, edited_prompts,
+                                          article_index=article_index, similarity_threshold=similarity_threshold, dedup_stats=dedup_stats,
+                                          results_store=results_store, run_id=run_id,
+                                          session_id=st.session_state.session_id, queue_status=queue_status,
+                                          partial_rerun=partial_rerun)
+
+                if dedup_enabled:
+                    st.info(f"Reused {dedup_stats['reused_calls']} evaluator calls across "
+                            f"{dedup_stats['exact_hits']} exact and {dedup_stats['near_hits']} near-duplicate articles.")
 
                 if stop_flag.is_set():
                     st.success("Processing paused. You can download the CSV with processed rows above.")
@@ -748,5 +1569,7 @@ def main():
 
                 st.write(df)
 
+        render_results_explorer(results_store)
+
 if __name__ == "__main__":
     main()